@@ -49,6 +49,12 @@ def _make_func(func_name):
                 threads_attempts = [1]
             else:
                 threads_attempts = [_CPU_COUNT, 1]
+        else:
+            # Negative values wrap around the number of cores, like the workers argument of scipy.fft.
+            if threads < 0:
+                threads = max(_CPU_COUNT + 1 + threads, 1)
+
+            threads_attempts = [threads]
 
         # Try multithreaded first, but fall back upon single-threaded if that doesn't work.
         for threads in threads_attempts:
@@ -1,7 +1,7 @@
 import numpy as np
 
 from .fast_fourier_transform import FastFourierTransform
-from ..field import Field, field_dot, field_conjugate_transpose
+from ..field import Field
 from .._math import fft as _fft_module
 
 
@@ -12,6 +12,15 @@ class FourierFilter(object):
     the equivalent multiplication in the Fourier domain using the FastFourierTransform
     classes. It does this by avoiding redundant field multiplications that limit performance.
 
+    The dtype of the filtered field follows from the input field and the transfer function.
+    Complex input fields always give a complex output field. Real input fields give a real
+    output field if the transfer function is Hermitian, that is, if it equals the complex
+    conjugate of itself mirrored through the origin of the Fourier domain, to within a relative
+    tolerance of 1e-12. In that case the filter uses real FFTs, and the imaginary part of the
+    output would be zero anyway. Real input fields with any other transfer function, including
+    matrix transfer functions, give a complex output field. Cast the input field to a complex
+    dtype if you always need a complex output field.
+
     Parameters
     ----------
     input_grid : Grid
@@ -33,29 +42,96 @@ class FourierFilter(object):
         self.cutout = fft.cutout_input
         self.shape_in = input_grid.shape
 
+        self._fft_axes = tuple(range(-input_grid.ndim, 0))
+
         self.transfer_function = transfer_function
 
+        # The slices covering the zeropadded region around the cutout. Only this region
+        # needs to be zeroed before each filtering operation.
+        self._rim = []
+        if self.cutout is not None:
+            self._cutout_slice = (Ellipsis,) + self.cutout
+            internal_shape = self.internal_grid.shape
+
+            for i, cutout in enumerate(self.cutout):
+                before = self.cutout[:i]
+                after = (slice(None),) * (len(self.cutout) - i - 1)
+
+                if cutout.start > 0:
+                    self._rim.append((Ellipsis,) + before + (slice(None, cutout.start),) + after)
+                if cutout.stop < internal_shape[i]:
+                    self._rim.append((Ellipsis,) + before + (slice(cutout.stop, None),) + after)
+
+        # Cache of (transfer function, conjugated transfer function, use real FFT) for each dtype.
+        self._transfer_functions = {}
+
+        self._shifted_transfer_function = None
         self._transfer_function = None
+        self._transfer_function_conj = None
+        self._use_real_fft = False
         self.internal_array = None
+        self._last_key = None
+        self._multiply_in_place = False
 
     def _compute_functions(self, field):
-        if self._transfer_function is None or self._transfer_function.dtype != field.dtype:
-            if hasattr(self.transfer_function, '__call__'):
-                tf = self.transfer_function(self.internal_grid)
-            else:
-                tf = self.transfer_function.copy()
+        # Nothing needs to be recomputed if the dtype and tensor shape did not change.
+        key = (field.dtype, field.shape[:-1])
+        if key == self._last_key:
+            return
+
+        if field.dtype not in self._transfer_functions:
+            # Evaluate and shift the transfer function only once; other dtypes are cast from this.
+            if self._shifted_transfer_function is None:
+                if hasattr(self.transfer_function, '__call__'):
+                    tf = self.transfer_function(self.internal_grid)
+                else:
+                    tf = self.transfer_function
 
-            tf = np.fft.ifftshift(tf.shaped, axes=tuple(range(-self.input_grid.ndim, 0)))
-            self._transfer_function = tf.astype(field.dtype, copy=False)
+                self._shifted_transfer_function = np.fft.ifftshift(np.asarray(tf.shaped), axes=self._fft_axes)
+
+            # The Fourier transform of a real field is always complex.
+            tf_dtype = np.result_type(field.dtype, np.complex64)
+            tf = self._shifted_transfer_function.astype(tf_dtype, copy=False)
+
+            use_real_fft = False
+            if not np.issubdtype(field.dtype, np.complexfloating) and (tf.ndim - self.internal_grid.ndim) != 2:
+                # A real field filtered by a Hermitian transfer function stays real, so only
+                # half of the Fourier domain needs to be computed.
+                tf_reversed = np.roll(np.flip(tf, axis=self._fft_axes), (1,) * len(self._fft_axes), axis=self._fft_axes)
+                atol = 1e-12 * np.abs(tf).max()
+
+                use_real_fft = np.allclose(tf, tf_reversed.conj(), rtol=1e-12, atol=atol)
+
+                if use_real_fft:
+                    tf = tf[..., :tf.shape[-1] // 2 + 1]
+
+            tf = np.ascontiguousarray(tf)
+
+            self._transfer_functions[field.dtype] = (tf, np.conj(tf), use_real_fft)
+
+        self._transfer_function, self._transfer_function_conj, self._use_real_fft = self._transfer_functions[field.dtype]
 
         recompute_internal_array = self.internal_array is None
         recompute_internal_array = recompute_internal_array or (self.internal_array.ndim != (field.grid.ndim + field.tensor_order))
         recompute_internal_array = recompute_internal_array or (self.internal_array.dtype != field.dtype)
-        recompute_internal_array = recompute_internal_array or not np.array_equal(self.internal_array.shape[:field.tensor_order], field.tensor_shape)
+        recompute_internal_array = recompute_internal_array or (self.internal_array.shape[:field.tensor_order] != field.shape[:-1])
 
         if recompute_internal_array:
             self.internal_array = self.internal_grid.zeros(field.tensor_shape, field.dtype).shaped
 
+        # The scalar transfer function can only be applied in place if it doesn't broadcast
+        # the Fourier transformed field to a larger shape. Matrix transfer functions are
+        # applied with einsum, which doesn't use this.
+        tf_tensor_shape = self._transfer_function.shape[:-self.internal_grid.ndim]
+        field_tensor_shape = field.shape[:-1]
+
+        if len(tf_tensor_shape) == 2:
+            self._multiply_in_place = False
+        else:
+            self._multiply_in_place = np.broadcast_shapes(tf_tensor_shape, field_tensor_shape) == field_tensor_shape
+
+        self._last_key = key
+
     def forward(self, field):
         '''Return the forward filtering of the input field.
 
@@ -107,47 +183,72 @@ class FourierFilter(object):
             f = field.shaped
         else:
             f = self.internal_array
-            f[:] = 0
-            c = tuple([slice(None)] * field.tensor_order) + self.cutout
-            f[c] = field.shaped
+
+            # The FFTs below may have overwritten the internal array, so the zeropadded
+            # region has to be reset. The interior is overwritten by the input field.
+            for rim in self._rim:
+                f[rim] = 0
+
+            f[self._cutout_slice] = field.shaped
 
         # Don't overwrite f if it shares memory with the input field.
         overwrite_x = self.cutout is not None
-        axes = tuple(range(-self.input_grid.ndim, 0))
 
-        f = _fft_module.fftn(f, axes=axes, overwrite_x=overwrite_x)
+        if self._use_real_fft:
+            f = _fft_module.rfftn(f, axes=self._fft_axes, overwrite_x=overwrite_x)
+        else:
+            f = _fft_module.fftn(f, axes=self._fft_axes, overwrite_x=overwrite_x)
 
         if (self._transfer_function.ndim - self.internal_grid.ndim) == 2:
-            # The transfer function is a matrix field.
-            s1 = f.shape[:-self.internal_grid.ndim] + (self.internal_grid.size,)
-            f = Field(f.reshape(s1), self.internal_grid)
-
-            s2 = self._transfer_function.shape[:-self.internal_grid.ndim] + (self.internal_grid.size,)
-            tf = Field(self._transfer_function.reshape(s2), self.internal_grid)
-
+            # The transfer function is a matrix field. Perform the matrix multiplication
+            # for each Fourier component directly on the shaped arrays.
             if adjoint:
-                tf = field_conjugate_transpose(tf)
+                tf = self._transfer_function_conj
+                tf_subscripts = 'ji...'
+            else:
+                tf = self._transfer_function
+                tf_subscripts = 'ij...'
+
+            if (f.ndim - self.internal_grid.ndim) == 2:
+                subscripts = tf_subscripts + ',jk...->ik...'
+            else:
+                subscripts = tf_subscripts + ',j...->i...'
 
-            f = field_dot(tf, f).shaped
+            f = np.einsum(subscripts, tf, f)
         else:
             # The transfer function is a scalar field.
             if adjoint:
-                tf = self._transfer_function.conj()
+                tf = self._transfer_function_conj
             else:
                 tf = self._transfer_function
 
-            # This is faster than f *= tf for Numpy due to it going back to C ordering.
-            f = f * tf
+            if not f.flags.c_contiguous:
+                f = np.ascontiguousarray(f)
 
-        # Since f is now guaranteed to not share memory, always allow overwriting.
+            # Multiply in place to avoid allocating another temporary array. This is only
+            # possible if the output of the multiplication has the same shape as f.
+            if self._multiply_in_place:
+                np.multiply(f, tf, out=f)
+            else:
+                f = f * tf
+
+        # Since f is now guaranteed to not share memory with the input field, always allow overwriting.
         overwrite_x = True
 
-        f = _fft_module.ifftn(f, axes=axes, overwrite_x=overwrite_x)
+        if self._use_real_fft:
+            f = _fft_module.irfftn(f, s=self.internal_grid.shape, axes=self._fft_axes, overwrite_x=overwrite_x)
+        else:
+            f = _fft_module.ifftn(f, axes=self._fft_axes, overwrite_x=overwrite_x)
 
         s = f.shape[:-self.internal_grid.ndim] + (-1,)
         if self.cutout is None:
             res = f.reshape(s)
         else:
-            res = f[c].reshape(s)
+            res = f[self._cutout_slice].reshape(s)
+
+            # The FFTs and the in-place multiplication may have been done in the internal array.
+            # Copy the result to avoid it being overwritten by the next call.
+            if np.may_share_memory(res, self.internal_array):
+                res = res.copy()
 
         return Field(res, self.input_grid)
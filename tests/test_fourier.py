@@ -292,6 +292,114 @@ def test_fourier_filter():
                     assert np.allclose(f_out_fft, f_out_ff)
                     assert np.allclose(f_in_fft, f_in_ff)
 
+def test_fourier_filter_matrix_field():
+    input_grid = make_pupil_grid(16)
+
+    # Tuples of (transfer function tensor shape, forward input tensor shape, backward input tensor shape).
+    cases = [
+        ((2, 2), (2, 2), (2, 2)),
+        ((2, 2), (2,), (2,)),
+        ((3, 2), (2,), (3,)),
+        ((3, 2), (2, 2), (3, 2)),
+    ]
+
+    for q in [1, 2]:
+        fft = FastFourierTransform(input_grid, q)
+
+        for tf_shape, forward_shape, backward_shape in cases:
+            transfer_function = np.random.randn(*tf_shape, fft.output_grid.size) + 1j * np.random.randn(*tf_shape, fft.output_grid.size)
+            transfer_function = Field(transfer_function, fft.output_grid)
+
+            fourier_filter = FourierFilter(input_grid, transfer_function, q)
+
+            f_forward = Field(np.random.randn(*forward_shape, input_grid.size) + 1j * np.random.randn(*forward_shape, input_grid.size), input_grid)
+            f_backward = Field(np.random.randn(*backward_shape, input_grid.size) + 1j * np.random.randn(*backward_shape, input_grid.size), input_grid)
+
+            f_out_ff = fourier_filter.forward(f_forward)
+            f_in_ff = fourier_filter.backward(f_backward)
+
+            f_out_fft = fft.backward(field_dot(transfer_function, fft.forward(f_forward)))
+            f_in_fft = fft.backward(field_dot(field_conjugate_transpose(transfer_function), fft.forward(f_backward)))
+
+            assert f_out_ff.shape == f_out_fft.shape
+            assert f_in_ff.shape == f_in_fft.shape
+
+            assert np.allclose(f_out_fft, f_out_ff)
+            assert np.allclose(f_in_fft, f_in_ff)
+
+def test_fourier_filter_result_not_overwritten():
+    input_grid = make_uniform_grid([64], [1])
+    fft = FastFourierTransform(input_grid, 2)
+
+    transfer_function = Field(np.exp(1j * np.random.randn(fft.output_grid.size)), fft.output_grid)
+    fourier_filter = FourierFilter(input_grid, transfer_function, 2)
+
+    a = Field(np.random.randn(input_grid.size) + 1j * np.random.randn(input_grid.size), input_grid)
+    b = Field(np.random.randn(input_grid.size) + 1j * np.random.randn(input_grid.size), input_grid)
+
+    res_a = fourier_filter.forward(a)
+    res_a_copy = res_a.copy()
+
+    fourier_filter.forward(b)
+
+    assert not np.shares_memory(res_a, fourier_filter.internal_array)
+    assert np.array_equal(res_a, res_a_copy)
+
+def test_fourier_filter_dtype_switching():
+    input_grid = make_pupil_grid(32)
+    fft = FastFourierTransform(input_grid, 2)
+
+    transfer_function = Field(np.exp(1j * np.random.randn(fft.output_grid.size)), fft.output_grid)
+    fourier_filter = FourierFilter(input_grid, transfer_function, 2)
+
+    f_in = Field(np.random.randn(input_grid.size) + 1j * np.random.randn(input_grid.size), input_grid)
+
+    f_out_ref = fft.backward(fft.forward(f_in) * transfer_function)
+    f_in_ref = fft.backward(fft.forward(f_out_ref) * transfer_function.conj())
+
+    for dtype in ['complex128', 'complex64', 'complex128', 'complex64']:
+        rtol = 1e-10 if dtype == 'complex128' else 1e-4
+        atol = 1e-10 if dtype == 'complex128' else 1e-4
+
+        f_out = fourier_filter.forward(f_in.astype(dtype))
+        f_in_back = fourier_filter.backward(f_out_ref.astype(dtype))
+
+        assert f_out.dtype == dtype
+        assert f_in_back.dtype == dtype
+
+        assert np.allclose(f_out, f_out_ref, rtol=rtol, atol=atol)
+        assert np.allclose(f_in_back, f_in_ref, rtol=rtol, atol=atol)
+
+def test_fourier_filter_real_input():
+    for n in [16, 17, [16, 17]]:
+        for q in [1, 2]:
+            input_grid = make_pupil_grid(n)
+            fft = FastFourierTransform(input_grid, q)
+
+            hermitian_tf = Field(np.exp(-fft.output_grid.as_('polar').r**2), fft.output_grid)
+            generic_tf = Field(np.exp(1j * np.random.randn(fft.output_grid.size)), fft.output_grid)
+
+            for transfer_function, is_hermitian in [(hermitian_tf, True), (generic_tf, False)]:
+                fourier_filter = FourierFilter(input_grid, transfer_function, q)
+
+                f_in = Field(np.random.randn(input_grid.size), input_grid)
+
+                f_out_ff = fourier_filter.forward(f_in)
+                f_in_ff = fourier_filter.backward(f_in)
+
+                f_out_fft = fft.backward(fft.forward(f_in) * transfer_function)
+                f_in_fft = fft.backward(fft.forward(f_in) * transfer_function.conj())
+
+                # Real output for real input is only promised for Hermitian transfer functions.
+                assert np.isrealobj(f_out_ff) == is_hermitian
+                assert np.isrealobj(f_in_ff) == is_hermitian
+
+                # Casting the input to complex always gives a complex output.
+                assert np.iscomplexobj(fourier_filter.forward(f_in.astype('complex128')))
+
+                assert np.allclose(f_out_fft, f_out_ff)
+                assert np.allclose(f_in_fft, f_in_ff)
+
 def check_czt_vs_scipy(x, m, w, a, dtype):
     # Check that the CZT gives the same answer as the scipy implementation.
     n = len(x)
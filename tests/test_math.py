@@ -55,3 +55,21 @@ def test_fft_acceleration(func, method, dtype_in, dtype_out):
 
         assert np.allclose(y_numpy, y_method, rtol=rtol, atol=rtol)
         assert y_method.dtype == dtype_out
+
+@pytest.mark.parametrize('method', ['numpy', 'scipy', 'fftw', 'mkl'])
+@pytest.mark.parametrize('threads', [1, 2, -1])
+def test_fft_threads(method, threads):
+    rng = np.random.default_rng(seed=0)
+
+    if method == 'fftw':
+        pytest.importorskip('pyfftw')
+
+    if method == 'mkl':
+        pytest.importorskip('mkl_fft')
+
+    x = rng.standard_normal((512, 512)) + 1j * rng.standard_normal((512, 512))
+
+    y_numpy = np.fft.fftn(x)
+    y_method = hcipy._math.fft.fftn(x, method=method, threads=threads)
+
+    assert np.allclose(y_numpy, y_method)